@@ -1,29 +1,94 @@
-from fastapi import FastAPI, Query, HTTPException
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi import FastAPI, Query, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from backend.offer_letter_agent import generate_offer_for, check_system_status, list_employees
-import traceback
+from backend.offer_letter_agent import generate_offer_for, stream_offer_for, check_system_status, list_employees, cached_vectorstore, _cached_agent, DATA_DIR, EMPLOYEE_CSV
 import logging
+import hashlib
+import mimetypes
 import os
+import re
+import asyncio
+import orjson
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 
-# Configure logging
+# Configure logging through a queue so stream I/O happens off the request path
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s", handlers=[logging.StreamHandler()])
+_stream_handler = logging.StreamHandler()
+_stream_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+_log_queue = queue.Queue(-1)
+logging.basicConfig(level=logging.INFO, handlers=[QueueHandler(_log_queue)])
+_log_listener = QueueListener(_log_queue, _stream_handler)
+_log_listener.start()
 logger.info("Initializing Offer Letter Generator API")
 
+# Use uvloop for faster async I/O when available (not supported on Windows)
+try:
+    import uvloop
+    uvloop.install()
+    logger.info("uvloop installed as the asyncio event loop policy")
+except ImportError:
+    logger.info("uvloop not available, using default asyncio event loop")
+
 # Load environment variables directly (no .env file on Railway)
 openrouter_key = os.getenv("OPENROUTER_API_KEY")
 pinecone_key = os.getenv("PINECONE_API_KEY")
-logger.debug(f"Loaded OPENROUTER_API_KEY: {openrouter_key[:4] if openrouter_key else 'None'}...[REDACTED]")
-logger.debug(f"Loaded PINECONE_API_KEY: {pinecone_key[:4] if pinecone_key else 'None'}...[REDACTED]")
+logger.debug("Loaded OPENROUTER_API_KEY: %s...[REDACTED]", (openrouter_key or "None")[:4])
+logger.debug("Loaded PINECONE_API_KEY: %s...[REDACTED]", (pinecone_key or "None")[:4])
 
 app = FastAPI(
     title="Offer Letter Generator API",
     description="Generate professional offer letters using company policies",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
+# Dedicated threadpool for blocking work (pandas, Pinecone, LLM calls) so the
+# event loop stays free between network waits
+executor = ThreadPoolExecutor(max_workers=32)
+
+@app.on_event("startup")
+async def configure_executor():
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(executor)
+    logger.info("Default executor configured with 32 worker threads")
+
+async def _try_warmup():
+    """One warmup pass; flips the readiness flag and returns True on success."""
+    try:
+        await asyncio.to_thread(_get_employees_payload)
+        await asyncio.to_thread(cached_vectorstore)
+        await asyncio.to_thread(_cached_agent)
+        app.state.ready = True
+        logger.info("Warmup complete: vectorstore and agent initialized")
+        return True
+    except Exception as e:
+        logger.error(f"Warmup attempt failed: {str(e)}")
+        return False
+
+@app.on_event("startup")
+async def warmup():
+    """Pre-load PDFs, vectorstore and agent so the first request doesn't pay the cost."""
+    app.state.ready = False
+    if await _try_warmup():
+        return
+
+    # A transient boot-time error must not latch readiness false for the
+    # process lifetime; keep retrying in the background (the lru_caches don't
+    # store failed calls, so each pass re-attempts for real) until it succeeds
+    async def _retry():
+        delay = 5.0
+        while True:
+            await asyncio.sleep(delay)
+            if await _try_warmup():
+                return
+            delay = min(delay * 2, 60.0)
+
+    logger.error("Warmup failed; retrying in the background until ready")
+    app.state.warmup_task = asyncio.create_task(_retry())
+
 # Check if build directory exists
 build_path = Path("frontend/build")
 if not build_path.exists():
@@ -32,7 +97,7 @@ if not build_path.exists():
 # API Routes (define these BEFORE mounting static files)
 @app.get("/api/")
 def root():
-    logger.info("API root endpoint accessed")
+    logger.debug("API root endpoint accessed")
     return {
         "message": "Offer Letter Generator API",
         "status": "running",
@@ -44,63 +109,88 @@ def root():
         }
     }
 
-# Basic health check
+# Basic health check (doubles as a readiness probe)
 @app.get("/api/health/")
 def health_check():
-    logger.info("Health check performed")
+    logger.debug("Health check performed")
+    if not getattr(app.state, "ready", False):
+        return ORJSONResponse(
+            status_code=503,
+            content={"status": "starting", "message": "Warmup in progress"}
+        )
     return {"status": "healthy", "message": "API is running"}
 
 # Check system status
 @app.get("/api/check-system-status/")
-def check_system_status_endpoint():
-    logger.info("Checking system status")
+async def check_system_status_endpoint():
+    logger.debug("Checking system status")
     try:
-        status = check_system_status()
-        logger.info(f"System status: {status['status']}")
+        status = await asyncio.to_thread(check_system_status)
+        logger.debug("System status: %s", status["status"])
         return status
     except Exception as e:
         logger.error(f"System status check failed: {str(e)}")
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=503,
             content={"system_status": "error", "message": f"Status check failed: {str(e)}"}
         )
 
+def _employee_csv_etag():
+    """ETag for the employee CSV based on its mtime and size (cheap, no file read)"""
+    stat = os.stat(os.path.join(DATA_DIR, EMPLOYEE_CSV))
+    return hashlib.md5(f"{stat.st_mtime}-{stat.st_size}".encode()).hexdigest()
+
+# Serialized /list-employees/ payload cached as raw JSON bytes keyed by ETag, so
+# serving the list is a memcpy with no pandas or JSON work on the request path
+_employees_payload = ("", b"")
+
+def _get_employees_payload():
+    global _employees_payload
+    etag = _employee_csv_etag()
+    if _employees_payload[0] != etag:
+        _employees_payload = (etag, orjson.dumps(list_employees()))
+    return _employees_payload
+
 # List all employees
 @app.get("/api/list-employees/")
-def get_employees():
-    logger.info("Listing employees")
+async def get_employees(request: Request):
+    logger.debug("Listing employees")
     try:
-        employees = list_employees()
-        logger.info(f"Successfully listed {employees['count']} employees")
-        return employees
+        etag, payload = await asyncio.to_thread(_get_employees_payload)
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304)
+
+        return Response(
+            content=payload,
+            media_type="application/json",
+            headers={"ETag": etag, "Cache-Control": "public, max-age=3600"}
+        )
     except Exception as e:
         logger.error(f"Failed to list employees: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to list employees: {str(e)}")
 
 # Generate offer letter
 @app.get("/api/generate-offer/")
-def generate_offer(name: str = Query(..., description="Employee name to generate offer letter for")):
+async def generate_offer(name: str = Query(..., description="Employee name to generate offer letter for")):
     try:
-        logger.info(f"Generating offer letter for employee: {name}")
-        response = generate_offer_for(name)
+        logger.debug("Generating offer letter for employee: %s", name)
+        response = await asyncio.to_thread(generate_offer_for, name)
         
         if "error" in response:
             logger.warning(f"Employee not found: {name}")
             raise HTTPException(status_code=404, detail=response["error"])
         
-        logger.info(f"Successfully generated offer letter for {name} using {response.get('method', 'unknown')} method")
+        logger.debug("Successfully generated offer letter for %s using %s method", name, response.get("method", "unknown"))
         return response
         
     except HTTPException as he:
         raise he
     except Exception as e:
-        traceback_str = traceback.format_exc()
-        logger.error(f"Error generating offer for {name}: {str(e)}")
-        print(traceback_str)
-        
+        logger.exception("Error generating offer for %s", name)
+
         error_str = str(e).lower()
         if "quota" in error_str or "429" in error_str or "insufficient_quota" in error_str:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=503,
                 content={
                     "error": "Service temporarily unavailable",
@@ -109,7 +199,7 @@ def generate_offer(name: str = Query(..., description="Employee name to generate
                 }
             )
         else:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=500,
                 content={
                     "error": f"Internal Server Error: {str(e)}",
@@ -117,41 +207,77 @@ def generate_offer(name: str = Query(..., description="Employee name to generate
                 }
             )
 
+class ImmutableStaticFiles(StaticFiles):
+    """StaticFiles for Vite bundles: filenames are content-hashed, so responses
+    can be cached forever and revisits skip the Python stack entirely."""
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+# Stream an offer letter over SSE; first tokens arrive as soon as the LLM
+# produces them instead of after the full generation
+@app.get("/api/generate-offer-stream/")
+async def generate_offer_stream(name: str = Query(..., description="Employee name to generate offer letter for")):
+    def event_stream():
+        try:
+            for chunk in stream_offer_for(name):
+                yield f"data: {orjson.dumps({'delta': chunk}).decode()}\n\n"
+            yield "data: [DONE]\n\n"
+        except Exception as e:
+            logger.exception("Error streaming offer for %s", name)
+            yield f"data: {orjson.dumps({'error': str(e)}).decode()}\n\n"
+
+    # Starlette iterates sync generators in its threadpool, keeping the loop free
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
 # Static file serving (mount static directories)
 if build_path.exists():
     # Mount the assets directory for CSS, JS, and other bundled assets
     assets_path = build_path / "assets"
     if assets_path.exists():
-        app.mount("/assets", StaticFiles(directory=str(assets_path)), name="assets")
+        app.mount("/assets", ImmutableStaticFiles(directory=str(assets_path)), name="assets")
         logger.info(f"Mounted /assets directory from {assets_path}")
     
-    # Serve individual static files that might be in the root
+    # Serve small root static files (favicon etc.) straight from memory: bytes
+    # are read once here, so requests cost no stat/open/read syscalls
     static_files = ["favicon.ico", "vite.svg", "robots.txt", "manifest.json"]
     for filename in static_files:
         file_path = build_path / filename
         if file_path.exists():
-            @app.get(f"/{filename}")
-            async def serve_static_file(filename=filename):
-                return FileResponse(str(build_path / filename))
+            def _make_static_route(content=file_path.read_bytes(),
+                                   content_type=mimetypes.guess_type(filename)[0] or "application/octet-stream"):
+                async def serve_static_file():
+                    return Response(
+                        content,
+                        media_type=content_type,
+                        headers={"Cache-Control": "public, max-age=86400"}
+                    )
+                return serve_static_file
+            app.get(f"/{filename}")(_make_static_route())
     
+    # index.html is fixed per deploy; cache the bytes and match static-asset
+    # extensions with one compiled regex instead of a Python tuple-endswith walk
+    _index_bytes = (build_path / "index.html").read_bytes()
+    _static_re = re.compile(r"\.(?:js|css|ico|svg|png|jpe?g|gif|woff2?|ttf|eot)$")
+
     # Root route - serve index.html
     @app.get("/")
     async def serve_index():
-        logger.info("Serving index.html for root route")
-        return FileResponse(str(build_path / "index.html"))
-    
+        logger.debug("Serving index.html for root route")
+        return Response(_index_bytes, media_type="text/html")
+
     # Catch-all route for React Router (must be last)
     @app.get("/{full_path:path}")
     async def serve_react_app(full_path: str):
         # Skip if it's an API route or static asset
-        if (full_path.startswith("api/") or 
-            full_path.startswith("assets/") or
-            full_path.endswith(('.js', '.css', '.ico', '.svg', '.png', '.jpg', '.jpeg', '.gif', '.woff', '.woff2', '.ttf', '.eot'))):
+        if full_path.startswith(("api/", "assets/")) or _static_re.search(full_path):
             raise HTTPException(status_code=404, detail="Not found")
-        
+
         # Serve index.html for all other routes (React Router will handle them)
-        logger.info(f"Serving React app for path: /{full_path}")
-        return FileResponse(str(build_path / "index.html"))
+        logger.debug("Serving React app for path: /%s", full_path)
+        return Response(_index_bytes, media_type="text/html")
 else:
     @app.get("/")
     async def no_frontend():
@@ -165,7 +291,7 @@ else:
 @app.exception_handler(404)
 async def not_found_handler(request, exc):
     logger.warning(f"404 Not Found for request {request.url}: {str(exc.detail) if hasattr(exc, 'detail') else 'Resource not found'}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=404,
         content={"error": "Not Found", "message": str(exc.detail) if hasattr(exc, 'detail') else "Resource not found"}
     )
@@ -173,17 +299,62 @@ async def not_found_handler(request, exc):
 @app.exception_handler(500)
 async def internal_error_handler(request, exc):
     logger.error(f"Unhandled server error for request {request.url}: {str(exc)}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={"error": "Internal Server Error", "message": "An unexpected error occurred"}
     )
 
-# CORS middleware
+# Response compression (offer letters are several KB of text, ~5-10x
+# compressible). Brotli when the optional brotli-asgi package is installed
+# (its gzip_fallback covers clients without 'br'), plain gzip otherwise —
+# never both, since a stacked inner gzip layer would compress first and make
+# the Brotli responder pass the already-encoded body through.
+class _CompressExceptSSE:
+    """Compression wrapper that bypasses the SSE streaming route.
+
+    gzip/brotli buffer writes until a compression window fills, so the
+    ~30-byte SSE events would sit in the compressor and arrive in one burst
+    at stream close, defeating token-by-token delivery.
+    """
+
+    def __init__(self, app, middleware_cls, **options):
+        self.app = app
+        self.compressed = middleware_cls(app, **options)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] == "/api/generate-offer-stream/":
+            await self.app(scope, receive, send)
+            return
+        await self.compressed(scope, receive, send)
+
+try:
+    from brotli_asgi import BrotliMiddleware
+    app.add_middleware(_CompressExceptSSE, middleware_cls=BrotliMiddleware, minimum_size=1024, gzip_fallback=True)
+    logger.info("Brotli compression middleware enabled")
+except ImportError:
+    from fastapi.middleware.gzip import GZipMiddleware
+    app.add_middleware(_CompressExceptSSE, middleware_cls=GZipMiddleware, minimum_size=1024)
+
+# CORS middleware (added exactly once; wildcard origins are ignored by browsers
+# when allow_credentials=True, so list the dev origins explicitly)
 from fastapi.middleware.cors import CORSMiddleware
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["http://localhost:5173", "http://127.0.0.1:5173", "*"],
+    allow_origins=["http://localhost:5173", "http://127.0.0.1:5173"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-)
\ No newline at end of file
+)
+if __name__ == "__main__":
+    import uvicorn
+    # One worker per core; each has its own GIL so CPU-bound work (pandas,
+    # embedding, JSON serialization) truly parallelizes. Workers warm their own
+    # vectorstore/agent via the startup event.
+    uvicorn.run(
+        "backend.main:app",
+        host="0.0.0.0",
+        port=int(os.getenv("PORT", "8000")),
+        workers=os.cpu_count(),
+        loop="uvloop",
+        http="httptools"
+    )
@@ -3,13 +3,13 @@ import pandas as pd
 from functools import lru_cache
 from dotenv import load_dotenv
 import logging
-from datetime import datetime
+from datetime import date
 from backend.utils.generator import get_agent_with_fallback, test_llm
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
-from backend.utils.loader import load_pdf
+from backend.utils.loader import load_pdfs
 from backend.utils.chunker import chunk_text
 from backend.utils.embedder import get_vectorstore
 
@@ -17,62 +17,100 @@ DATA_DIR = "backend/data"
 PDF_FILES = ["HR Leave Policy.pdf", "HR Travel Policy.pdf", "HR Offer Letter.pdf"]
 EMPLOYEE_CSV = "Employee_List.csv"
 
+def _iter_chunks():
+    """Yield policy chunks for all PDFs; extraction runs in parallel across files."""
+    paths = []
+    for file in PDF_FILES:
+        path = os.path.join(DATA_DIR, file)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Missing: {file}")
+        paths.append(path)
+    for raw_text in load_pdfs(paths):
+        yield from chunk_text(raw_text)
+
 @lru_cache(maxsize=1)
 def cached_vectorstore():
     try:
-        docs = []
-        for file in PDF_FILES:
-            path = os.path.join(DATA_DIR, file)
-            if not os.path.exists(path):
-                raise FileNotFoundError(f"Missing: {file}")
-            raw_text = load_pdf(path)
-            docs.extend(chunk_text(raw_text))
-        return get_vectorstore(docs)
+        return get_vectorstore(_iter_chunks())
     except Exception as e:
         logger.error(f"VectorStore setup error: {str(e)}")
         raise RuntimeError(f"VectorStore setup error: {str(e)}")
 
+@lru_cache(maxsize=1)
+def _cached_agent():
+    """Build the agent (LLM client, prompt, chain) once per process."""
+    return get_agent_with_fallback(cached_vectorstore())
+
+# Parsed-CSV cache keyed on file mtime so repeat requests skip disk I/O and
+# pandas type inference entirely
+_CSV_CACHE = {}
+
+def _load_employees() -> pd.DataFrame:
+    path = os.path.join(DATA_DIR, EMPLOYEE_CSV)
+    mtime = os.path.getmtime(path)
+    cached = _CSV_CACHE.get("df")
+    if cached and cached[0] == mtime:
+        return cached[1]
+    df = pd.read_csv(path)
+    df.columns = [col.strip().lower().replace(" ", "_") for col in df.columns]
+    if "employee_name" not in df.columns:
+        raise RuntimeError("Missing 'Employee Name' column in CSV.")
+    # Lowercased-name index so lookups are a single hash instead of a full scan
+    _CSV_CACHE["index"] = (mtime, {
+        str(row["employee_name"]).lower(): row.to_dict() for _, row in df.iterrows()
+    })
+    _CSV_CACHE["df"] = (mtime, df)
+    return df
+
+# Display date string cached per day; strftime pays format parsing and locale
+# lookups on every call otherwise
+_TODAY = (None, None)
+
+def _today_str():
+    global _TODAY
+    today = date.today()
+    if _TODAY[0] != today.toordinal():
+        _TODAY = (today.toordinal(), today.strftime("%B %d, %Y"))
+    return _TODAY[1]
+
 def get_employee_record(name: str) -> dict:
     try:
-        df = pd.read_csv(os.path.join(DATA_DIR, EMPLOYEE_CSV))
-        df.columns = [col.strip().lower().replace(" ", "_") for col in df.columns]
-        if "employee_name" not in df.columns:
-            raise RuntimeError("Missing 'Employee Name' column in CSV.")
-
-        record = df[df["employee_name"].str.lower() == name.lower()]
-        if record.empty:
+        _load_employees()
+        record = _CSV_CACHE["index"][1].get(name.lower())
+        if record is None:
             logger.warning(f"No employee found with name: {name}")
             raise ValueError(f"No employee found with name: {name}")
-        return record.iloc[0].to_dict()
+        return record
     except Exception as e:
         logger.error(f"CSV read error: {str(e)}")
         raise RuntimeError(f"CSV read error: {str(e)}")
 
+def _build_input(employee: dict) -> dict:
+    return {
+        "name": employee["employee_name"],
+        "band": employee["band"],
+        "team": employee["department"],
+        "location": employee["location"],
+        "joining_date": employee["joining_date"],
+        "salary_breakup": {
+            "base": employee["base_salary_(inr)"],
+            "bonus": employee["performance_bonus_(inr)"],
+            "retention": employee["retention_bonus_(inr)"],
+            "total": employee["total_ctc_(inr)"]
+        },
+        "query": f"Offer letter for {employee['employee_name']} joining {employee['department']} at {employee['location']} on {employee['joining_date']}",
+        "generated_date": _today_str()
+    }
+
 def generate_offer_for(name: str):
     try:
         employee = get_employee_record(name)
         if employee is None:
             return {"error": f"Employee '{name}' not found in Employee_List.csv"}
 
-        vectorstore = cached_vectorstore()
+        input_data = _build_input(employee)
 
-        input_data = {
-            "name": employee["employee_name"],
-            "band": employee["band"],
-            "team": employee["department"],
-            "location": employee["location"],
-            "joining_date": employee["joining_date"],
-            "salary_breakup": {
-                "base": employee["base_salary_(inr)"],
-                "bonus": employee["performance_bonus_(inr)"],
-                "retention": employee["retention_bonus_(inr)"],
-                "total": employee["total_ctc_(inr)"]
-            },
-            "query": f"Offer letter for {employee['employee_name']} joining {employee['department']} at {employee['location']} on {employee['joining_date']}",
-            "generated_date": datetime.now().strftime("%B %d, %Y")
-        }
-
-        agent = get_agent_with_fallback(vectorstore)
+        agent = _cached_agent()
         offer_letter = agent.invoke(input_data)
 
         logger.info(f"Successfully generated offer letter for: {name} using {agent.__class__.__name__}")
@@ -93,10 +131,16 @@ def generate_offer_for(name: str):
         logger.error(f"Offer generation failed for {name}: {str(e)}")
         raise RuntimeError(f"Offer generation failed: {str(e)}")
 
+def stream_offer_for(name: str):
+    """Yield offer letter text chunks for an employee as they are generated."""
+    employee = get_employee_record(name)
+    agent = _cached_agent()
+    yield from agent.stream(_build_input(employee))
+
 def check_system_status():
     try:
         vectorstore = cached_vectorstore()
-        df = pd.read_csv(os.path.join(DATA_DIR, EMPLOYEE_CSV))
+        df = _load_employees()
         employee_count = len(df)
         llm_status = test_llm()  # Tests OpenRouter.ai connectivity
         llm_message = "OpenRouter.ai LLM available" if llm_status else "OpenRouter.ai LLM unavailable, using template fallback"
@@ -137,19 +181,19 @@ def check_openrouter_status():
 
 def list_employees():
     try:
-        df = pd.read_csv(os.path.join(DATA_DIR, EMPLOYEE_CSV))
-        df.columns = [col.strip().lower().replace(" ", "_") for col in df.columns]
-
-        employees = []
-        for _, row in df.iterrows():
-            employees.append({
-                "name": row.get("employee_name", ""),
-                "band": row.get("band", ""),
-                "department": row.get("department", ""),
-                "location": row.get("location", ""),
-                "joining_date": row.get("joining_date", ""),
-                "salary": row.get("total_ctc_(inr)", "")
-            })
+        df = _load_employees()
+
+        # Vectorized column select + rename; avoids the slow per-row iterrows path
+        cols = {
+            "employee_name": "name",
+            "band": "band",
+            "department": "department",
+            "location": "location",
+            "joining_date": "joining_date",
+            "total_ctc_(inr)": "salary"
+        }
+        available = [col for col in cols if col in df.columns]
+        employees = df[available].rename(columns=cols).fillna("").to_dict(orient="records")
 
         logger.info(f"Successfully listed {len(employees)} employees")
         return {"employees": employees, "count": len(employees)}
@@ -1,5 +1,10 @@
+from functools import lru_cache
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
+@lru_cache(maxsize=8)
+def _splitter(chunk_size, overlap):
+    """One splitter per (chunk_size, overlap) pair; its constructor compiles separators."""
+    return RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=overlap)
+
 def chunk_text(text, chunk_size=600, overlap=80):
-    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=overlap)
-    return splitter.split_text(text)
+    return _splitter(chunk_size, overlap).split_text(text)
@@ -1,4 +1,5 @@
 import os
+from itertools import islice
 from dotenv import load_dotenv
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_community.vectorstores import Pinecone as LangchainPinecone
@@ -16,14 +17,49 @@ logger = logging.getLogger(__name__)
 INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "offer-letter-index")
 CLOUD_PROVIDER = os.getenv("PINECONE_CLOUD", "aws")
 REGION = os.getenv("PINECONE_REGION", "us-west-2")
+EMBED_DEVICE = os.getenv("EMBED_DEVICE", "cpu")  # Set to "cuda" when a GPU is available
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch")  # "onnx" for the int8 ONNX Runtime path
+
+# Process-wide Pinecone client so every get_vectorstore call reuses the same
+# pooled HTTP connections instead of re-handshaking TLS
+_PINECONE_CLIENT = None
+
+def _pinecone_client():
+    global _PINECONE_CLIENT
+    if _PINECONE_CLIENT is None:
+        api_key = os.getenv("PINECONE_API_KEY")
+        if not api_key:
+            raise ValueError("PINECONE_API_KEY environment variable not set")
+        _PINECONE_CLIENT = Pinecone(api_key=api_key)
+        logger.info("Pinecone client initialized successfully")
+    return _PINECONE_CLIENT
+
+def _get_embeddings():
+    """Return the embedding backend; ONNX int8 when requested and available."""
+    if EMBED_BACKEND == "onnx":
+        try:
+            from backend.utils.onnx_embedder import ONNXMiniLMEmbeddings
+            embed = ONNXMiniLMEmbeddings(batch_size=EMBED_BATCH_SIZE)
+            logger.info("Using ONNX int8 MiniLM embeddings")
+            return embed
+        except ImportError as e:
+            logger.warning(f"ONNX backend requested but unavailable ({e}), falling back to PyTorch")
+    return HuggingFaceEmbeddings(
+        model_name="all-MiniLM-L6-v2",
+        model_kwargs={"device": EMBED_DEVICE},
+        encode_kwargs={"batch_size": EMBED_BATCH_SIZE, "normalize_embeddings": True}
+    )
 
 def get_vectorstore(docs=None):
     """
     Initialize and return a Pinecone vector store with HuggingFace embeddings.
-    
+
     Args:
-        docs (list, optional): List of documents to embed and store if creating a new index.
-    
+        docs (iterable, optional): Documents (list or generator) to embed and
+            store if creating a new index. Consumed in batches so only one
+            batch of texts and embeddings is held in memory at a time.
+
     Returns:
         LangchainPinecone: The initialized vector store.
     
@@ -33,21 +69,18 @@ def get_vectorstore(docs=None):
         RuntimeError: For other initialization errors.
     """
     try:
-        # Initialize embeddings for vector storage
-        embed = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-        logger.info("HuggingFaceEmbeddings initialized successfully for vector storage with model: all-MiniLM-L6-v2")
+        # Initialize embeddings for vector storage; a large batch size keeps the
+        # MiniLM forward pass as a few big matmuls instead of many small ones
+        embed = _get_embeddings()
+        logger.info("Embeddings initialized successfully for vector storage with model: all-MiniLM-L6-v2")
         
         # Get embedding dimension dynamically
         sample_embedding = embed.embed_query("sample text")
         dimension = len(sample_embedding)
         logger.info(f"Embedding dimension detected: {dimension}")
 
-        # Initialize Pinecone client
-        api_key = os.getenv("PINECONE_API_KEY")
-        if not api_key:
-            raise ValueError("PINECONE_API_KEY environment variable not set")
-        pc = Pinecone(api_key=api_key)
-        logger.info("Pinecone client initialized successfully")
+        # Initialize Pinecone client (one per process; reuses pooled connections)
+        pc = _pinecone_client()
 
         # Check if index exists
         existing_indexes = [index.name for index in pc.list_indexes()]
@@ -62,7 +95,17 @@ def get_vectorstore(docs=None):
                 spec=ServerlessSpec(cloud=CLOUD_PROVIDER, region=REGION)
             )
             logger.info(f"Index {INDEX_NAME} created successfully")
-            return LangchainPinecone.from_texts(docs, embed, index_name=INDEX_NAME)
+            vectorstore = LangchainPinecone.from_existing_index(INDEX_NAME, embed)
+            docs_iter = iter(docs)
+            total = 0
+            while True:
+                batch = list(islice(docs_iter, EMBED_BATCH_SIZE))
+                if not batch:
+                    break
+                vectorstore.add_texts(batch, batch_size=EMBED_BATCH_SIZE)
+                total += len(batch)
+            logger.info(f"Ingested {total} chunks into index {INDEX_NAME}")
+            return vectorstore
         else:
             logger.info(f"Loading existing Pinecone index: {INDEX_NAME}")
             return LangchainPinecone.from_existing_index(INDEX_NAME, embed)
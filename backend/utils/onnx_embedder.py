@@ -0,0 +1,75 @@
+import os
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MODEL_ID = "sentence-transformers/all-MiniLM-L6-v2"
+ONNX_CACHE_DIR = os.getenv("ONNX_CACHE_DIR", "backend/data/onnx")
+
+
+class ONNXMiniLMEmbeddings:
+    """MiniLM embeddings on ONNX Runtime with dynamic int8 quantization.
+
+    Drop-in replacement for HuggingFaceEmbeddings (implements
+    embed_documents/embed_query) that runs the 22M-param MiniLM encoder
+    through onnxruntime instead of PyTorch fp32. Int8 halves memory
+    bandwidth and roughly doubles CPU throughput with negligible
+    retrieval accuracy loss. Requires the optional optimum[onnxruntime]
+    dependency.
+    """
+
+    def __init__(self, batch_size=64):
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.batch_size = batch_size
+        self.tokenizer = AutoTokenizer.from_pretrained(MODEL_ID)
+
+        os.makedirs(ONNX_CACHE_DIR, exist_ok=True)
+        quantized_path = os.path.join(ONNX_CACHE_DIR, "model_int8.onnx")
+        if not os.path.exists(quantized_path):
+            logger.info("Exporting MiniLM to ONNX and quantizing to int8...")
+            model = ORTModelForFeatureExtraction.from_pretrained(
+                MODEL_ID, export=True, provider="CPUExecutionProvider"
+            )
+            model.save_pretrained(ONNX_CACHE_DIR)
+            quantize_dynamic(
+                os.path.join(ONNX_CACHE_DIR, "model.onnx"),
+                quantized_path,
+                weight_type=QuantType.QInt8
+            )
+            logger.info(f"Quantized model saved to {quantized_path}")
+
+        self.session = ort.InferenceSession(
+            quantized_path, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        logger.info("ONNX int8 MiniLM embedder initialized")
+
+    def _encode_batch(self, texts):
+        encoded = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=256, return_tensors="np"
+        )
+        feed = {k: v for k, v in encoded.items() if k in self._input_names}
+        token_embeddings = self.session.run(None, feed)[0]
+
+        # Mean-pool over non-padding tokens, then L2-normalize
+        mask = encoded["attention_mask"][..., np.newaxis].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        counts = np.clip(mask.sum(axis=1), 1e-9, None)
+        embeddings = summed / counts
+        norms = np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings / norms
+
+    def embed_documents(self, texts):
+        vectors = []
+        for i in range(0, len(texts), self.batch_size):
+            vectors.extend(self._encode_batch(texts[i:i + self.batch_size]).tolist())
+        return vectors
+
+    def embed_query(self, text):
+        return self._encode_batch([text])[0].tolist()